@@ -11,78 +11,142 @@ Given an assembly file and a target label, this script:
 
 Also traces WITHIN the target routine to check if Y is read between
 the space-skip exit and the point where Y is reloaded.
+
+Targets can be given on the command line, read one per line from a
+file with --targets-file, or both; the file is only loaded once.
 """
 
+import argparse
 import re
 import sys
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 
-# Instructions that READ Y
-Y_READERS = {
-    'STY', 'TYA', 'CPY', 'PHY',
-    # Indexed addressing modes that use Y
-    'LDA', 'STA', 'CMP', 'ADC', 'SBC', 'AND', 'ORA', 'EOR',
-}
-
-# Instructions that unconditionally WRITE Y (kill Y's old value)
-Y_WRITERS = {'LDY', 'PLY', 'TAY', 'INY', 'DEY', 'TXY'}
+# Instructions whose implied operand is Y; those that overwrite Y without
+# reading it; and those that do both
+Y_IMPLIED_READERS = frozenset({'STY', 'TYA', 'CPY', 'PHY'})
+Y_KILLERS = frozenset({'LDY', 'PLY', 'TAY'})
+Y_READ_WRITERS = frozenset({'INY', 'DEY'})
 
-# Instructions that MIGHT use Y depending on addressing mode
-# (zp),Y and abs,Y modes read Y
-Y_ADDR_PATTERNS = re.compile(r'\(.*\),Y|,Y\b', re.IGNORECASE)
+# Operand separators, and what a label reference looks like between them
+OPERAND_SPLIT = re.compile(r'[\s,()+\-]+')
+LABEL_TOKEN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
 
 # Branch instructions
-BRANCHES = {'BEQ', 'BNE', 'BCC', 'BCS', 'BMI', 'BPL', 'BVS', 'BVC', 'BRA'}
-UNCONDITIONAL = {'JMP', 'BRA', 'RTS', 'RTI', 'BRK'}
+BRANCHES = frozenset({'BEQ', 'BNE', 'BCC', 'BCS', 'BMI', 'BPL', 'BVS', 'BVC', 'BRA'})
+UNCONDITIONAL = frozenset({'JMP', 'BRA', 'RTS', 'RTI', 'BRK'})
+RETURNS = frozenset({'RTS', 'RTI'})
+
+# Assembler directives that generate no instruction
+DIRECTIVES = ('EQUB', 'EQUS', 'EQUW', 'SAVE', 'CPU', 'ORG')
+
+# 65C02 mnemonics, interned to small ints. Slot 0 marks label-only lines;
+# slot 1 catches anything else the parser lets through (assignments,
+# conditional assembly and the like).
+ALL_MNEMONICS = (
+    None, '?',
+    'ADC', 'AND', 'ASL', 'BCC', 'BCS', 'BEQ', 'BIT', 'BMI', 'BNE', 'BPL',
+    'BRA', 'BRK', 'BVC', 'BVS', 'CLC', 'CLD', 'CLI', 'CLV', 'CMP', 'CPX',
+    'CPY', 'DEC', 'DEX', 'DEY', 'EOR', 'INC', 'INX', 'INY', 'JMP', 'JSR',
+    'LDA', 'LDX', 'LDY', 'LSR', 'NOP', 'ORA', 'PHA', 'PHP', 'PHX', 'PHY',
+    'PLA', 'PLP', 'PLX', 'PLY', 'ROL', 'ROR', 'RTI', 'RTS', 'SBC', 'SEC',
+    'SED', 'SEI', 'STA', 'STX', 'STY', 'STZ', 'TAX', 'TAY', 'TRB', 'TSB',
+    'TSX', 'TXA', 'TXS', 'TYA',
+)
+MNEMONIC_ID = {name: i for i, name in enumerate(ALL_MNEMONICS)}
+NO_MNEMONIC = MNEMONIC_ID[None]
+OTHER_MNEMONIC = MNEMONIC_ID['?']
+
+# Per-instruction flag bits, precomputed once by build_tables(). All but
+# the Y-indexed half of READS_Y_BIT depend only on the mnemonic, and are
+# looked up from CLASS_BITS.
+READS_Y_BIT = 0x01
+KILLS_Y_BIT = 0x02
+BRANCH_BIT = 0x04
+JSR_BIT = 0x08
+JMP_BIT = 0x10
+RETURN_BIT = 0x20   # RTS or RTI
+BRK_BIT = 0x40
+COND_BIT = 0x80     # conditional branch
+# Any bit that stops the trace or sends it somewhere other than idx + 1
+SPECIAL_BITS = (READS_Y_BIT | KILLS_Y_BIT | RETURN_BIT | BRK_BIT |
+                JSR_BIT | JMP_BIT | BRANCH_BIT)
+
+# Flat per-instruction arrays, all indexed like the instruction list.
+# target_idx holds the resolved branch/jump destination, or -1.
+Tables = namedtuple('Tables', 'mnemonic_id flags target_idx')
+
+# _trace_y_core() work arrays, keyed by instruction count and reused
+# from one trace to the next
+_SCRATCH = {}
+
+def _strip_code(line):
+    """Return line without its comment or surrounding whitespace."""
+    semi = line.find(';')
+    if semi >= 0:
+        line = line[:semi]
+    return line.strip()
 
 def parse_instruction(line):
     """Parse an assembly line into (label, mnemonic, operand) or None."""
-    # Strip comments
-    line = line.split(';')[0].strip()
+    line = _strip_code(line)
     if not line:
         return None
+    return parse_code(line)
 
+def parse_code(line):
+    """As parse_instruction, for a line already stripped of comments and blanks."""
     label = None
     if line.startswith('.'):
         # Label definition
         parts = line.split(None, 1)
-        label = parts[0][1:]  # remove leading dot
+        label = sys.intern(parts[0][1:])  # remove leading dot
         if len(parts) < 2:
             return ('label', label, None, None)
         line = parts[1].strip()
 
     # Skip directives
-    if not line or line.startswith('EQUB') or line.startswith('EQUS') or line.startswith('EQUW'):
-        return ('directive', label, None, None) if label else None
-    if line.startswith('SAVE') or line.startswith('CPU') or line.startswith('ORG'):
+    if not line or line.startswith(DIRECTIVES):
         return ('directive', label, None, None) if label else None
 
     parts = line.split(None, 1)
-    mnemonic = parts[0].upper()
-    operand = parts[1].strip() if len(parts) > 1 else ''
+    # Interned: the same few mnemonics and labels recur on thousands of lines
+    mnemonic = sys.intern(parts[0].upper())
+    operand = sys.intern(parts[1].strip()) if len(parts) > 1 else ''
 
     return ('instr', label, mnemonic, operand)
 
 def reads_y(mnemonic, operand):
-    """Check if this instruction reads the Y register."""
-    if mnemonic in ('STY', 'TYA', 'CPY', 'PHY'):
+    """
+    Check if this instruction reads the Y register.
+    Tracing tests READS_Y_BIT instead; build_tables() sets it from
+    CLASS_BITS plus one y_indexed() check per instruction.
+    """
+    if mnemonic in Y_IMPLIED_READERS:
         return True
     # Check for Y-indexed addressing modes
-    if Y_ADDR_PATTERNS.search(operand):
+    if y_indexed(operand):
         return True
     return False
 
+def y_indexed(operand):
+    """Check for the Y-indexed addressing modes, (zp),Y and abs,Y / zp,Y."""
+    operand = operand.upper()
+    return operand.endswith(',Y') or '),Y' in operand
+
 def writes_y(mnemonic, operand):
     """Check if this instruction unconditionally writes Y."""
-    if mnemonic in ('LDY', 'PLY', 'TAY'):
+    if mnemonic in Y_KILLERS:
         return True
     # INY and DEY read AND write Y
-    if mnemonic in ('INY', 'DEY'):
+    if mnemonic in Y_READ_WRITERS:
         return True  # They write Y, but also read it first
     return False
 
 def kills_y(mnemonic, operand):
     """Check if this instruction overwrites Y without reading old value."""
-    if mnemonic in ('LDY', 'PLY', 'TAY'):
+    if mnemonic in Y_KILLERS:
         return True
     return False
 
@@ -107,7 +171,11 @@ def load_asm(filename):
     instructions = []
     with open(filename) as f:
         for i, line in enumerate(f, 1):
-            parsed = parse_instruction(line)
+            # Drop comments and blank lines here rather than in the parser
+            line = _strip_code(line)
+            if not line:
+                continue
+            parsed = parse_code(line)
             if parsed:
                 kind, label, mnemonic, operand = parsed
                 if kind == 'label':
@@ -126,177 +194,508 @@ def build_label_index(instructions):
             idx[label] = i
     return idx
 
-def trace_y_liveness(instructions, label_idx, start_idx, max_depth=50, context_label=""):
+def build_operand_index(instructions):
+    """Map each label named in an operand to the indices referencing it."""
+    refs = {}
+    for i, (line_num, label, mnemonic, operand) in enumerate(instructions):
+        if not operand:
+            continue
+        for token in OPERAND_SPLIT.split(operand):
+            if LABEL_TOKEN.fullmatch(token):
+                users = refs.setdefault(token, [])
+                if not users or users[-1] != i:
+                    users.append(i)
+    return refs
+
+def _class_bits():
+    """Flag bits implied by each interned mnemonic alone."""
+    bits = array('B', bytes(len(ALL_MNEMONICS)))
+    for i, mnemonic in enumerate(ALL_MNEMONICS):
+        if mnemonic is None:
+            continue
+        f = 0
+        if reads_y(mnemonic, ''):
+            f |= READS_Y_BIT
+        if kills_y(mnemonic, ''):
+            f |= KILLS_Y_BIT
+        if is_branch(mnemonic):
+            f |= BRANCH_BIT
+            if mnemonic != 'BRA':
+                f |= COND_BIT
+        if is_jsr(mnemonic):
+            f |= JSR_BIT
+        if mnemonic == 'JMP':
+            f |= JMP_BIT
+        if mnemonic in RETURNS:
+            f |= RETURN_BIT
+        if mnemonic == 'BRK':
+            f |= BRK_BIT
+        bits[i] = f
+    return bits
+
+CLASS_BITS = _class_bits()
+
+def build_tables(instructions, label_idx):
+    """Classify every instruction once, so tracing needs no string work."""
+    n = len(instructions)
+    mnemonic_id = array('B', bytes(n))
+    flags = array('B', bytes(n))
+    target_idx = array('i', [-1]) * n
+    for i, (line_num, label, mnemonic, operand) in enumerate(instructions):
+        if mnemonic is None:
+            continue
+        mid = MNEMONIC_ID.get(mnemonic, OTHER_MNEMONIC)
+        mnemonic_id[i] = mid
+        f = CLASS_BITS[mid]
+        # Check for Y-indexed addressing modes
+        if y_indexed(operand):
+            f |= READS_Y_BIT
+        flags[i] = f
+        if f & (BRANCH_BIT | JMP_BIT):
+            target = get_branch_target(operand)
+            if target and target in label_idx:
+                target_idx[i] = label_idx[target]
+    return Tables(mnemonic_id, flags, target_idx)
+
+# Events reported by _trace_y_core(), each paired with an instruction index
+EV_LIVE = 0         # Y read before being killed
+EV_LIVE_RW = 1      # Y read and written by the same instruction
+EV_KILLED = 2       # Y overwritten without being read
+EV_RETURN = 3       # RTS/RTI reached without Y use
+EV_BRK = 4          # BRK reached, no return
+EV_JSR = 5          # JSR traced through
+EV_UNRESOLVED = 6   # JMP target could not be resolved
+EV_DEPTH = 7        # depth limit reached
+
+def _trace_y_core(mnemonic_id, flags, target_idx, start_idx, max_depth):
     """
-    Trace forward from start_idx, checking if Y is read before being killed.
-    Returns (is_live, trace_description).
-    Uses BFS to handle branches.
+    BFS over the flag tables from start_idx. Returns (events, pred), where
+    events lists (EV_*, idx) in the order found and pred[i] is the index
+    instruction i was first reached from (-1 for the start). pred is only
+    meaningful for instructions this trace reached, and only until the
+    next trace, which reuses it.
+    Each instruction is queued at most once.
     """
-    visited = set()
-    queue = [(start_idx, [])]
-    results = []
-
-    while queue:
-        idx, path = queue.pop(0)
-
-        if idx in visited or idx >= len(instructions):
+    n = len(flags)
+    if n not in _SCRATCH:
+        _SCRATCH.clear()
+        _SCRATCH[n] = (array('i', bytes(4 * (n + 1))),   # queue
+                       array('i', bytes(4 * (n + 1))),   # pred
+                       array('i', bytes(4 * (n + 1))),   # depth
+                       bytearray(n + 1))                 # seen
+    queue, pred, depth, seen = _SCRATCH[n]
+    events = []
+    # Bound locally: LOAD_FAST is cheaper than a global lookup per step
+    add_event = events.append
+    no_mnemonic, special_bits = NO_MNEMONIC, SPECIAL_BITS
+    if start_idx >= n:
+        return events, pred
+
+    seen[start_idx] = 1
+    pred[start_idx] = -1
+    depth[start_idx] = 0
+    head, tail = 0, 1
+    queue[0] = start_idx
+
+    while head < tail:
+        idx = queue[head]
+        head += 1
+
+        if idx >= n:
             continue
-        if len(path) > max_depth:
-            results.append(f"  DEPTH LIMIT reached at path: {' -> '.join(path)}")
+        if depth[idx] > max_depth:
+            add_event((EV_DEPTH, idx))
             continue
-        visited.add(idx)
 
-        line_num, label, mnemonic, operand = instructions[idx]
-
-        if mnemonic is None:
+        mid = mnemonic_id[idx]
+        f = flags[idx]
+        if mid == no_mnemonic:
             # Label-only line, continue to next
-            queue.append((idx + 1, path))
-            continue
-
-        step = f"L{line_num}:{mnemonic} {operand}"
-        new_path = path + [step]
-
-        # Check if this instruction reads Y
-        if reads_y(mnemonic, operand):
-            if not kills_y(mnemonic, operand):
-                # Y is read before being killed — it's LIVE
-                results.append(f"  Y IS LIVE: {mnemonic} {operand} at line {line_num}")
-                results.append(f"    Path: {' -> '.join(new_path)}")
-                continue
-            else:
-                # INY/DEY: reads then writes — Y is live
-                results.append(f"  Y IS LIVE (read+write): {mnemonic} {operand} at line {line_num}")
-                results.append(f"    Path: {' -> '.join(new_path)}")
+            d = depth[idx]
+            succ, other = idx + 1, -1
+        elif not f & special_bits:
+            # Regular instruction, continue to next
+            d = depth[idx] + 1
+            succ, other = idx + 1, -1
+        else:
+            d = depth[idx] + 1
+
+            # Check if this instruction reads Y
+            if f & READS_Y_BIT:
+                if not f & KILLS_Y_BIT:
+                    # Y is read before being killed — it's LIVE
+                    add_event((EV_LIVE, idx))
+                else:
+                    # INY/DEY: reads then writes — Y is live
+                    add_event((EV_LIVE_RW, idx))
                 continue
 
-        # Check if this instruction kills Y (writes without reading)
-        if kills_y(mnemonic, operand):
-            # Y is dead — this path is safe
-            results.append(f"  Y killed by {mnemonic} {operand} at line {line_num} (safe)")
-            continue
-
-        # Handle control flow
-        if mnemonic == 'RTS' or mnemonic == 'RTI':
-            results.append(f"  RTS at line {line_num} without Y use (safe)")
-            continue
+            # Check if this instruction kills Y (writes without reading)
+            if f & KILLS_Y_BIT:
+                # Y is dead — this path is safe
+                add_event((EV_KILLED, idx))
+                continue
 
-        if mnemonic == 'BRK':
-            results.append(f"  BRK (error) at line {line_num} (safe - no return)")
-            continue
+            # Handle control flow
+            if f & RETURN_BIT:
+                add_event((EV_RETURN, idx))
+                continue
 
-        if mnemonic == 'JSR':
-            # JSR: assume subroutine may clobber Y (conservative)
-            # Actually, we should check if the subroutine preserves Y
-            # For now, assume JSR clobbers A/X/Y (conservative = safe assumption)
-            # But actually, if JSR preserves Y, then Y is still live after
-            # The conservative assumption for liveness is: JSR does NOT kill Y
-            # (because the subroutine might preserve it)
-            # BUT: for our purposes, we want to know if Y from the space-skip
-            # reaches the caller. If a JSR happens first, the subroutine will
-            # set up its own Y. So we can't assume Y survives.
-            #
-            # Actually the truly conservative approach: don't assume JSR kills Y.
-            # Continue tracing after the JSR.
-            results.append(f"  JSR {operand} at line {line_num} (Y may or may not survive)")
-            queue.append((idx + 1, new_path))
-            continue
+            if f & BRK_BIT:
+                add_event((EV_BRK, idx))
+                continue
 
-        if mnemonic == 'JMP':
-            target = get_branch_target(operand)
-            if target and target in label_idx:
-                queue.append((label_idx[target], new_path))
+            target = target_idx[idx]
+            if f & JSR_BIT:
+                # JSR: assume subroutine may clobber Y (conservative)
+                # Actually, we should check if the subroutine preserves Y
+                # For now, assume JSR clobbers A/X/Y (conservative = safe assumption)
+                # But actually, if JSR preserves Y, then Y is still live after
+                # The conservative assumption for liveness is: JSR does NOT kill Y
+                # (because the subroutine might preserve it)
+                # BUT: for our purposes, we want to know if Y from the space-skip
+                # reaches the caller. If a JSR happens first, the subroutine will
+                # set up its own Y. So we can't assume Y survives.
+                #
+                # Actually the truly conservative approach: don't assume JSR kills Y.
+                # Continue tracing after the JSR.
+                add_event((EV_JSR, idx))
+                succ, other = idx + 1, -1
+            elif f & JMP_BIT:
+                if target < 0:
+                    add_event((EV_UNRESOLVED, idx))
+                    continue
+                succ, other = target, -1
+            elif f & COND_BIT:
+                # Conditional: trace both paths (fall-through, taken)
+                succ, other = idx + 1, target
             else:
-                results.append(f"  JMP to unresolved target {operand} at line {line_num}")
-            continue
-
-        if is_branch(mnemonic):
-            target = get_branch_target(operand)
-            if mnemonic == 'BRA':
                 # Unconditional branch
-                if target and target in label_idx:
-                    queue.append((label_idx[target], new_path))
-                continue
+                succ, other = target, -1
+
+        if succ >= 0 and not seen[succ]:
+            seen[succ] = 1
+            pred[succ] = idx
+            depth[succ] = d
+            queue[tail] = succ
+            tail += 1
+        if other >= 0 and not seen[other]:
+            seen[other] = 1
+            pred[other] = idx
+            depth[other] = d
+            queue[tail] = other
+            tail += 1
+
+    # Everything marked seen was queued, so this clears seen for reuse
+    for k in range(tail):
+        seen[queue[k]] = 0
+
+    return events, pred
+
+def trace_path(instructions, pred, idx):
+    """Rebuild the list of steps from the trace start up to idx via pred."""
+    path = []
+    while idx >= 0:
+        line_num, label, mnemonic, operand = instructions[idx]
+        if mnemonic is not None:
+            path.append(f"L{line_num}:{mnemonic} {operand}")
+        idx = pred[idx]
+    path.reverse()
+    return path
+
+def trace_y_liveness(instructions, tables, start_idx, max_depth=50, context_label="",
+                     emit=print):
+    """
+    Trace forward from start_idx, checking if Y is read before being killed.
+    Each report line is passed to emit as soon as it is formatted.
+    The traversal itself is done by _trace_y_core(); this only turns its
+    events into report lines.
+    """
+    events, pred = _trace_y_core(*tables, start_idx, max_depth)
+    for event, idx in events:
+        line_num, label, mnemonic, operand = instructions[idx]
+        if event == EV_LIVE:
+            path = trace_path(instructions, pred, idx)
+            emit(f"  Y IS LIVE: {mnemonic} {operand} at line {line_num}")
+            emit(f"    Path: {' -> '.join(path)}")
+        elif event == EV_LIVE_RW:
+            path = trace_path(instructions, pred, idx)
+            emit(f"  Y IS LIVE (read+write): {mnemonic} {operand} at line {line_num}")
+            emit(f"    Path: {' -> '.join(path)}")
+        elif event == EV_KILLED:
+            emit(f"  Y killed by {mnemonic} {operand} at line {line_num} (safe)")
+        elif event == EV_RETURN:
+            emit(f"  RTS at line {line_num} without Y use (safe)")
+        elif event == EV_BRK:
+            emit(f"  BRK (error) at line {line_num} (safe - no return)")
+        elif event == EV_JSR:
+            emit(f"  JSR {operand} at line {line_num} (Y may or may not survive)")
+        elif event == EV_UNRESOLVED:
+            emit(f"  JMP to unresolved target {operand} at line {line_num}")
+        elif event == EV_DEPTH:
+            path = trace_path(instructions, pred, pred[idx])
+            emit(f"  DEPTH LIMIT reached at path: {' -> '.join(path)}")
+
+# Per-instruction Y liveness computed by compute_live_y(), ordered so that
+# joining paths is just max()
+Y_DEAD = 0          # every path kills Y, returns or BRKs before reading it
+Y_UNKNOWN = 1       # no path reads Y, but some leave the analysable code
+Y_LIVE = 2          # some path reads Y before killing it
+
+def _successors(mid, f, target, idx, n):
+    """
+    Instructions control can pass to from idx, as the trace follows it.
+    An unresolved conditional branch also leads to n, the off-the-end node,
+    so that its taken path counts as leaving the analysable code.
+    """
+    if mid == NO_MNEMONIC:
+        return (idx + 1,)
+    if f & (READS_Y_BIT | KILLS_Y_BIT | RETURN_BIT | BRK_BIT):
+        return ()
+    if f & JSR_BIT:
+        return (idx + 1,)
+    if f & (JMP_BIT | BRANCH_BIT):
+        if f & COND_BIT:
+            return (idx + 1, target if target >= 0 else n)
+        return (target,) if target >= 0 else ()
+    return (idx + 1,)
+
+def build_cfg(tables):
+    """
+    Successors of every instruction in CSR form: the successors of i are
+    targets[offsets[i]:offsets[i + 1]]. Index len(instructions) stands for
+    running off the end of the file, or taking a conditional branch whose
+    target is unresolved, and has none.
+    """
+    mnemonic_id, flags, target_idx = tables
+    n = len(flags)
+    offsets = array('i', bytes(4 * (n + 2)))
+    targets = array('i')
+    for i in range(n):
+        offsets[i] = len(targets)
+        targets.extend(_successors(mnemonic_id[i], flags[i], target_idx[i], i, n))
+    offsets[n] = offsets[n + 1] = len(targets)
+    return offsets, targets
+
+def reverse_postorder(offsets, targets):
+    """Order the CFG nodes by reverse postorder, using an iterative DFS."""
+    n = len(offsets) - 1
+    seen = bytearray(n)
+    order = array('i')
+    stack = []
+    for root in range(n):
+        if seen[root]:
+            continue
+        seen[root] = 1
+        stack.append((root, offsets[root]))
+        while stack:
+            v, e = stack[-1]
+            if e < offsets[v + 1]:
+                stack[-1] = (v, e + 1)
+                w = targets[e]
+                if not seen[w]:
+                    seen[w] = 1
+                    stack.append((w, offsets[w]))
             else:
-                # Conditional: trace both paths
-                queue.append((idx + 1, new_path))  # fall-through
-                if target and target in label_idx:
-                    queue.append((label_idx[target], new_path))  # taken
-                continue
-
-        # Regular instruction, continue to next
-        queue.append((idx + 1, new_path))
+                stack.pop()
+                order.append(v)
+    order.reverse()
+    return order
 
-    return results
-
-def find_callers(instructions, target_label):
+def compute_live_y(tables):
+    """
+    Classify every instruction as Y_LIVE, Y_DEAD or Y_UNKNOWN in one
+    backward dataflow pass, so any start point can then be answered with
+    a lookup. Unlike trace_y_liveness() there is no depth limit.
+    Nodes are swept in postorder, successors first, until nothing changes.
+    """
+    mnemonic_id, flags, target_idx = tables
+    offsets, targets = build_cfg(tables)
+    n = len(flags)
+    live = bytearray(n + 1)
+    fixed = bytearray(n + 1)
+    live[n] = Y_UNKNOWN
+    fixed[n] = 1
+    for i in range(n):
+        if offsets[i] < offsets[i + 1]:
+            continue
+        fixed[i] = 1
+        if flags[i] & READS_Y_BIT:
+            live[i] = Y_LIVE
+        elif not flags[i] & (KILLS_Y_BIT | RETURN_BIT | BRK_BIT):
+            live[i] = Y_UNKNOWN    # unresolved JMP/BRA target; unresolved
+                                   # conditional branches reach node n instead
+
+    postorder = reverse_postorder(offsets, targets)
+    postorder.reverse()
+    changed = True
+    while changed:
+        changed = False
+        for v in postorder:
+            if fixed[v]:
+                continue
+            val = live[v]
+            for e in range(offsets[v], offsets[v + 1]):
+                if live[targets[e]] > val:
+                    val = live[targets[e]]
+            if val != live[v]:
+                live[v] = val
+                changed = True
+    return live
+
+def find_callers(instructions, operand_refs, target_label):
     """Find all JSR/JMP/BRA/Bxx instructions referencing the target."""
     callers = []
-    for i, (line_num, label, mnemonic, operand) in enumerate(instructions):
-        if mnemonic and operand and target_label in operand:
+    for i in operand_refs.get(target_label, ()):
+        line_num, label, mnemonic, operand = instructions[i]
+        if mnemonic:
             if mnemonic == 'JSR':
                 callers.append(('JSR', i, line_num))
             elif mnemonic in BRANCHES or mnemonic == 'JMP':
                 callers.append((mnemonic, i, line_num))
     return callers
 
-def main():
-    if len(sys.argv) < 3:
-        print(f"Usage: {sys.argv[0]} <asm_file> <label> [<label2> ...]")
-        sys.exit(1)
+def report_y_liveness(instructions, tables, live_y, start_idx, where, max_depth=50,
+                      emit=print):
+    """Report the Y verdict from live_y, tracing only when Y is live."""
+    verdict = live_y[start_idx]
+    if verdict == Y_LIVE:
+        # The verdict is not depth-limited, but the trace showing why may
+        # stop short of the read
+        emit(f"  Y live {where}")
+        trace_y_liveness(instructions, tables, start_idx, max_depth,
+                         context_label=where, emit=emit)
+    elif verdict == Y_DEAD:
+        emit(f"  Y dead on every path {where} (safe)")
+    else:
+        emit(f"  Y not read {where}, but some paths leave "
+             "the analysable code (unresolved jump or branch, or end of file)")
+
+# Analysis state shared by every target, installed by _set_globals() in
+# the main process or once per worker process
+_SHARED = None
+
+def _set_globals(instructions, label_idx, tables, operand_refs, live_y, max_depth):
+    """Install the state analyse_target() works from."""
+    global _SHARED
+    _SHARED = (instructions, label_idx, tables, operand_refs, live_y, max_depth)
+
+def analyse_target(target, emit=None):
+    """
+    Analyse one target against the _SHARED state. Returns the report lines
+    for its callers and for its own body, as two lists. If emit is given,
+    the callers' lines go straight to it instead and their list is empty.
+    """
+    instructions, label_idx, tables, operand_refs, live_y, max_depth = _SHARED
+    callers_out = []
+    within_out = []
+    if emit is None:
+        emit = callers_out.append
+
+    emit(f"\n{'='*60}")
+    emit(f"Analyzing Y liveness for callers of {target}")
+    emit(f"{'='*60}")
+
+    if target not in label_idx:
+        emit(f"  ERROR: Label {target} not found!")
+        return callers_out, within_out
+
+    callers = find_callers(instructions, operand_refs, target)
+    emit(f"Found {len(callers)} references to {target}")
+
+    for call_type, idx, line_num in callers:
+        # Skip self-references (BEQ within the loop)
+        instr = instructions[idx]
+        if call_type == 'BEQ' and instr[2] == 'BEQ':
+            # Internal loop branch, skip
+            continue
 
-    filename = sys.argv[1]
-    targets = sys.argv[2:]
+        emit(f"\n--- {call_type} {target} at line {line_num} ---")
 
-    print(f"Loading {filename}...")
-    instructions = load_asm(filename)
-    label_idx = build_label_index(instructions)
-    print(f"Loaded {len(instructions)} instructions, {len(label_idx)} labels")
+        if call_type == 'JSR':
+            # The question is: does the caller use Y after JSR returns?
+            # live_y already answers that for the instruction AFTER the
+            # JSR; only trace from there to show how Y is used.
+            if live_y[idx + 1] == Y_LIVE:
+                emit(f"Tracing Y liveness AFTER JSR return (from line {line_num + 1}):")
+            report_y_liveness(instructions, tables, live_y, idx + 1,
+                              "after JSR return", max_depth, emit)
+        else:
+            emit(f"  Branch reference ({call_type}), not a JSR caller")
 
-    for target in targets:
-        print(f"\n{'='*60}")
-        print(f"Analyzing Y liveness for callers of {target}")
-        print(f"{'='*60}")
+    # Also trace Y liveness WITHIN the routine
+    emit = within_out.append
+    emit(f"\n{'='*60}")
+    emit(f"Tracing Y liveness WITHIN {target} (from the label itself)")
+    emit(f"{'='*60}")
 
-        if target not in label_idx:
-            print(f"  ERROR: Label {target} not found!")
-            continue
+    report_y_liveness(instructions, tables, live_y, label_idx[target],
+                      f"within {target}", max_depth, emit)
+    return callers_out, within_out
 
-        callers = find_callers(instructions, target)
-        print(f"Found {len(callers)} references to {target}")
+def read_targets(filename):
+    """Read target labels from a file, one per line, ignoring blank lines."""
+    with open(filename) as f:
+        return [line.strip() for line in f if line.strip()]
 
-        for call_type, idx, line_num in callers:
-            # Skip self-references (BEQ within the loop)
-            instr = instructions[idx]
-            if call_type == 'BEQ' and instr[2] == 'BEQ':
-                # Internal loop branch, skip
-                continue
+def main():
+    parser = argparse.ArgumentParser(
+        description="Report where Y is live after calls to 6502 routines.")
+    parser.add_argument('asm_file', help="assembly source to analyse")
+    parser.add_argument('targets', nargs='*', metavar='label',
+                        help="routine labels to analyse")
+    parser.add_argument('--targets-file', metavar='FILE',
+                        help="read further labels from FILE, one per line")
+    parser.add_argument('--max-depth', type=int, default=50, metavar='N',
+                        help="longest path to trace when showing how a live Y "
+                             "is used; the verdicts themselves are not limited "
+                             "(default: %(default)s)")
+    parser.add_argument('-j', '--jobs', type=int, default=1, metavar='N',
+                        help="analyse targets in N worker processes "
+                             "(default: %(default)s)")
+    # Intermixed, so options may also sit between the file and the labels
+    args = parser.parse_intermixed_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    filename = args.asm_file
+    targets = list(args.targets)
+    if args.targets_file:
+        try:
+            targets += read_targets(args.targets_file)
+        except OSError as e:
+            parser.error(f"cannot read targets file: {e}")
+    if not targets:
+        parser.error("no target labels given")
 
-            print(f"\n--- {call_type} {target} at line {line_num} ---")
-
-            if call_type == 'JSR':
-                # Trace from the instruction AFTER the JSR
-                # But we need to know what Y is when the JSR returns
-                # The question is: does the caller use Y after JSR returns?
-                print(f"Tracing Y liveness AFTER JSR return (from line {line_num + 1}):")
-                results = trace_y_liveness(instructions, label_idx, idx + 1,
-                                          context_label=f"after JSR {target}")
-                for r in results:
-                    print(r)
-            else:
-                print(f"  Branch reference ({call_type}), not a JSR caller")
+    print(f"Loading {filename}...")
+    instructions = load_asm(filename)
+    label_idx = build_label_index(instructions)
+    tables = build_tables(instructions, label_idx)
+    operand_refs = build_operand_index(instructions)
+    live_y = compute_live_y(tables)
+    print(f"Loaded {len(instructions)} instructions, {len(label_idx)} labels")
 
-    # Also trace Y liveness WITHIN the routine
-    for target in targets:
-        if target not in label_idx:
-            continue
-        print(f"\n{'='*60}")
-        print(f"Tracing Y liveness WITHIN {target} (from the label itself)")
-        print(f"{'='*60}")
-
-        start = label_idx[target]
-        results = trace_y_liveness(instructions, label_idx, start)
-        for r in results:
-            print(r)
+    shared = (instructions, label_idx, tables, operand_refs, live_y, args.max_depth)
+    if args.jobs > 1:
+        # Targets are independent once the tables are built; each worker
+        # receives them once, and map() keeps results in target order
+        with ProcessPoolExecutor(args.jobs, initializer=_set_globals,
+                                 initargs=shared) as pool:
+            reports = list(pool.map(analyse_target, targets,
+                                    chunksize=max(1, len(targets) // (4 * args.jobs))))
+        for callers_out, within_out in reports:
+            for line in callers_out:
+                print(line)
+    else:
+        # Stream the callers sections; only the within-routine sections,
+        # which come after all of them, need holding back
+        _set_globals(*shared)
+        reports = [analyse_target(target, print) for target in targets]
+
+    for callers_out, within_out in reports:
+        for line in within_out:
+            print(line)
 
 if __name__ == '__main__':
     main()